@@ -19,6 +19,19 @@ def main():
         type=str,
         help='Directory to save the bot_ips_config.py file (default: current directory)',
     )
+    parser.add_argument(
+        '-f',
+        '--format',
+        choices=['range', 'cidr'],
+        default='range',
+        help='Write IP ranges as start_ip-end_ip ranges or in CIDR notation (default: range)',
+    )
+    parser.add_argument(
+        '--async',
+        dest='use_async',
+        action='store_true',
+        help='Fetch endpoints on an asyncio event loop (requires the async extra)',
+    )
 
     args = parser.parse_args()
 
@@ -43,7 +56,9 @@ def main():
         output_path = output_filename
 
     # Generate the bot IPs configuration
-    return generate_bot_ips(output_path)
+    return generate_bot_ips(
+        output_path, range_format=args.format, use_async=args.use_async
+    )
 
 
 if __name__ == "__main__":
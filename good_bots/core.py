@@ -4,12 +4,18 @@ Core functionality to fetch bot IP addresses from various sources and generate a
 file compatible with django-turnstile-site-protect.
 """
 
-import ipaddress
-import json
+import asyncio
+import hashlib
 import os
+import re
+import socket
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
 from datetime import datetime
-from typing import List
+from functools import lru_cache, partial
+from typing import List, Literal
 
 try:
     from importlib.resources import files
@@ -17,35 +23,258 @@ except ImportError:
     # Fallback for Python < 3.9
     from importlib_resources import files
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+
+from . import __version__
+
+try:
+    import aiohttp
+except ImportError:
+    # Optional: endpoints are fetched on a thread pool without the async extra
+    aiohttp = None
+
+# Shared session so endpoints on the same host reuse pooled keep-alive connections
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=32))
+# Provider range lists compress well; requests decodes them transparently
+_SESSION.headers.update({'Accept-Encoding': 'gzip, deflate'})
+
+# Output formats: start_ip-end_ip ranges or CIDR notation
+RangeFormat = Literal['range', 'cidr']
+
+# Concurrent endpoint fetches; stays within the session's pool_maxsize
+_MAX_WORKERS = 16
+
+# Connection limit for the aiohttp fan-out when the async extra is installed
+_ASYNC_CONNECTION_LIMIT = 32
+
+# Output file buffer size; amortizes write syscalls for large configurations
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# Values per line for the integer lookup tables in the generated file
+_TABLE_LINE_WIDTH = 8
+
+# Lookup helper appended to the generated file, matching against the tables
+_LOOKUP_FUNCTION = '''
+
+def is_good_bot(ip):
+    """Return True if the IPv4 address string falls within a good bot range."""
+    try:
+        ip_int = int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+    except (OSError, TypeError):
+        return False
+    i = bisect_right(GOOD_BOT_STARTS, ip_int) - 1
+    return i >= 0 and ip_int <= GOOD_BOT_ENDS[i]
+'''
+
+# Shape of an IPv4 CIDR; cheaply rejects IPv6 prefixes before any parsing
+_IPV4_CIDR = re.compile(r'(?:\d{1,3}\.){3}\d{1,3}(?:/\d{1,2})?', re.ASCII)
+
+# Network mask for every prefix length, indexed by prefix length
+_PREFIX_MASKS = tuple((0xFFFFFFFF << (32 - plen)) & 0xFFFFFFFF for plen in range(33))
+
+
+def _cache_paths(url: str) -> tuple:
+    """Return the cached body and metadata file paths for a URL."""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    cache_dir = os.path.join(cache_home, 'good-bots')
+    return (
+        os.path.join(cache_dir, f'{key}.json'),
+        os.path.join(cache_dir, f'{key}.meta.json'),
+    )
+
+
+def _load_cached(url: str) -> tuple:
+    """Load conditional request headers and the cached body for a URL."""
+    body_path, meta_path = _cache_paths(url)
+    try:
+        with open(meta_path, 'rb') as f:
+            meta = orjson.loads(f.read())
+        with open(body_path, 'rb') as f:
+            body = f.read()
+    except (OSError, orjson.JSONDecodeError):
+        return {}, None
+
+    # A body from another write than its metadata can't be revalidated
+    if meta.get('sha256') != hashlib.sha256(body).hexdigest():
+        return {}, None
+
+    headers = {}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    return headers, body
+
+
+def _replace_file(path: str, data: bytes) -> None:
+    """Write data to a uniquely named temporary file and rename it over path."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        with suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def _store_cached(url: str, headers: dict, content: bytes) -> None:
+    """Cache a response body along with its validators for later revalidation."""
+    etag = headers.get('ETag')
+    last_modified = headers.get('Last-Modified')
+    if not etag and not last_modified:
+        return
+
+    body_path, meta_path = _cache_paths(url)
+    meta = {
+        'url': url,
+        'etag': etag,
+        'last_modified': last_modified,
+        'sha256': hashlib.sha256(content).hexdigest(),
+    }
+    try:
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        # Readers never see partial files; the metadata goes last and names
+        # the body it belongs to, in case concurrent writers interleave
+        _replace_file(body_path, content)
+        _replace_file(meta_path, orjson.dumps(meta))
+    except OSError as e:
+        print(f"Warning: Could not cache {url}: {e}", file=sys.stderr)
 
 
 def fetch_json(url: str) -> dict:
-    """Fetch JSON data from a URL with SSL verification."""
+    """Fetch JSON data from a URL with SSL verification.
+
+    Responses with an ETag or Last-Modified header are cached on disk and
+    revalidated with a conditional request, so unchanged endpoints reply 304.
+    """
+    headers, cached_body = _load_cached(url)
     try:
-        response = requests.get(url, timeout=30, verify=True)
+        response = _SESSION.get(url, timeout=30, verify=True, headers=headers)
+        if response.status_code == 304:
+            return orjson.loads(cached_body)
+
         response.raise_for_status()
-        return response.json()
+        data = orjson.loads(response.content)
+        _store_cached(url, response.headers, response.content)
+        return data
     except requests.RequestException as e:
         print(f"Error fetching {url}: {e}", file=sys.stderr)
         return None
+    except orjson.JSONDecodeError as e:
+        print(f"Invalid JSON from {url}: {e}", file=sys.stderr)
+        return None
 
 
-def cidr_to_range(cidr: str) -> str:
-    """Convert CIDR notation to start_ip-end_ip format."""
+def _parse_cidr(cidr: str) -> tuple:
+    """Parse CIDR notation into its address string, integer and prefix length."""
+    ip_str, sep, prefix_len = cidr.partition('/')
     try:
-        network = ipaddress.IPv4Network(cidr, strict=False)
-        start_ip = str(network.network_address)
-        end_ip = str(network.broadcast_address)
-        return f"{start_ip}-{end_ip}"
-    except ValueError as e:
+        # inet_pton only accepts strict dotted quads, unlike inet_aton
+        ip_int = int.from_bytes(socket.inet_pton(socket.AF_INET, ip_str), 'big')
+        # isdigit alone would let non-ASCII digits such as '٢٤' through int()
+        if sep and not (prefix_len.isascii() and prefix_len.isdigit()):
+            raise ValueError(f"'{prefix_len}' is not a valid netmask")
+        plen = int(prefix_len) if sep else 32
+        if plen > 32:
+            raise ValueError(f"'{prefix_len}' is not a valid netmask")
+    except (OSError, ValueError) as e:
         print(f"Invalid CIDR {cidr}: {e}", file=sys.stderr)
         return None
 
+    return ip_str, ip_int, plen
+
+
+def _int_to_ip(value: int) -> str:
+    """Format an integer IPv4 address as a dotted quad."""
+    return socket.inet_ntoa(value.to_bytes(4, 'big'))
+
+
+# Provider lists overlap, so the same CIDR is often converted more than once
+@lru_cache(maxsize=65536)
+def _cidr_interval(cidr: str, range_format: RangeFormat = 'range') -> tuple:
+    """Parse a CIDR into (start, end, text), with text in the given output format."""
+    parsed = _parse_cidr(cidr)
+    if parsed is None:
+        return None
+
+    # inet_pton only accepts canonical dotted quads, so the input address can
+    # be written back as is instead of formatting the integers again
+    ip_str, ip_int, plen = parsed
+    if plen == 32:
+        # Single hosts need no masking either
+        text = f"{ip_str}/32" if range_format == 'cidr' else f"{ip_str}-{ip_str}"
+        return ip_int, ip_int, text
+
+    start = ip_int & _PREFIX_MASKS[plen]
+    end = start | (_PREFIX_MASKS[plen] ^ 0xFFFFFFFF)
+    if range_format == 'cidr':
+        # Only prefixes with host bits set need their network address formatted
+        text = f"{ip_str}/{plen}" if start == ip_int else f"{_int_to_ip(start)}/{plen}"
+    elif plen == 24:
+        # /24 bounds are the address with its last octet swapped for 0 and 255
+        network = ip_str.rpartition('.')[0]
+        text = f"{network}.0-{network}.255"
+    else:
+        text = f"{_int_to_ip(start)}-{_int_to_ip(end)}"
+    return start, end, text
+
+
+def cidr_to_range(cidr: str) -> str:
+    """Convert CIDR notation to start_ip-end_ip format."""
+    interval = _cidr_interval(cidr, 'range')
+    return interval[2] if interval else None
+
+
+def _parse_range(ip_range: str) -> tuple:
+    """Parse start_ip-end_ip format, or a single IP, into integer bounds."""
+    start_ip, sep, end_ip = ip_range.partition('-')
+    start = int.from_bytes(socket.inet_pton(socket.AF_INET, start_ip.strip()), 'big')
+    if not sep:
+        return start, start
+    end = int.from_bytes(socket.inet_pton(socket.AF_INET, end_ip.strip()), 'big')
+    if start > end:
+        raise ValueError("start address is after end address")
+    return start, end
+
+
+def _summarize_interval(start: int, end: int) -> List[str]:
+    """Return the fewest CIDRs covering exactly the addresses from start to end."""
+    cidrs = []
+    while start <= end:
+        # Largest block aligned at start that still fits inside the interval
+        size = start & -start if start else 1 << 32
+        while size > end - start + 1:
+            size >>= 1
+        cidrs.append(f"{_int_to_ip(start)}/{33 - size.bit_length()}")
+        start += size
+    return cidrs
+
+
+def range_to_cidrs(ip_range: str) -> List[str]:
+    """Convert start_ip-end_ip format to the CIDRs covering exactly that range."""
+    try:
+        return _summarize_interval(*_parse_range(ip_range))
+    except (OSError, ValueError) as e:
+        print(f"Invalid IP range {ip_range}: {e}", file=sys.stderr)
+        return []
 
-def extract_ipv4_addresses(data: dict) -> List[str]:
-    """Extract IPv4 addresses from JSON data and convert to range format."""
+
+def extract_ipv4_intervals(
+    data: dict, range_format: RangeFormat = 'range'
+) -> List[tuple]:
+    """Extract IPv4 prefixes from JSON data as (start, end, text) intervals.
+
+    The integer bounds feed collapse_bot_ranges; text is the prefix in the
+    requested range or CIDR format.
+    """
     ipv4_ranges = []
+    cidrs = []
 
     # Basic validation of API response structure
     if not isinstance(data, dict):
@@ -67,73 +296,270 @@ def extract_ipv4_addresses(data: dict) -> List[str]:
 
         if 'ipv4Prefix' in prefix:
             cidr = prefix['ipv4Prefix']
-            if isinstance(cidr, str):
-                ip_range = cidr_to_range(cidr)
-                if ip_range:
-                    ipv4_ranges.append(ip_range)
+            if isinstance(cidr, str) and _IPV4_CIDR.fullmatch(cidr) is not None:
+                cidrs.append(cidr)
             else:
                 print(f"Warning: Invalid ipv4Prefix format: {cidr}", file=sys.stderr)
 
-    return ipv4_ranges
+    # Convert the whole endpoint in one pass once the prefixes are collected
+    intervals = [_cidr_interval(cidr, range_format) for cidr in cidrs]
+    return [interval for interval in intervals if interval]
+
+
+def extract_ipv4_addresses(
+    data: dict, range_format: RangeFormat = 'range'
+) -> List[str]:
+    """Extract IPv4 addresses from JSON data in range or CIDR format."""
+    return [interval[2] for interval in extract_ipv4_intervals(data, range_format)]
+
+
+def fetch_ipv4_intervals(url: str, range_format: RangeFormat = 'range') -> List[tuple]:
+    """Fetch an endpoint and keep only its IPv4 intervals, dropping the payload."""
+    endpoint_data = fetch_json(url)
+    if not endpoint_data:
+        return None
+    return extract_ipv4_intervals(endpoint_data, range_format)
+
+
+async def _fetch_json_async(session: "aiohttp.ClientSession", url: str) -> dict:
+    """Fetch JSON data from a URL on an aiohttp session, like fetch_json."""
+    # Cache files are read and written on worker threads to keep the loop free
+    headers, cached_body = await asyncio.to_thread(_load_cached, url)
+    try:
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304:
+                return orjson.loads(cached_body)
+
+            response.raise_for_status()
+            content = await response.read()
+        data = orjson.loads(content)
+        await asyncio.to_thread(_store_cached, url, response.headers, content)
+        return data
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"Error fetching {url}: {e}", file=sys.stderr)
+        return None
+    except orjson.JSONDecodeError as e:
+        print(f"Invalid JSON from {url}: {e}", file=sys.stderr)
+        return None
 
 
-def load_additional_bots(config_file: str = None) -> dict:
-    """Load additional bot IP ranges from configuration file."""
+async def _fetch_ipv4_intervals_async(
+    session: "aiohttp.ClientSession", url: str, range_format: RangeFormat
+) -> List[tuple]:
+    """Fetch an endpoint on an aiohttp session and keep only its IPv4 intervals."""
+    endpoint_data = await _fetch_json_async(session, url)
+    if not endpoint_data:
+        return None
+    return extract_ipv4_intervals(endpoint_data, range_format)
+
+
+async def _fetch_all_ipv4_intervals(
+    urls: List[str], range_format: RangeFormat
+) -> List[List[tuple]]:
+    """Fetch every endpoint concurrently on one event loop, in endpoint order."""
+    connector = aiohttp.TCPConnector(limit=_ASYNC_CONNECTION_LIMIT)
+    timeout = aiohttp.ClientTimeout(total=30)
+    # Honour proxy and .netrc settings from the environment, as requests does
+    async with aiohttp.ClientSession(
+        connector=connector, timeout=timeout, trust_env=True
+    ) as session:
+        return await asyncio.gather(
+            *(_fetch_ipv4_intervals_async(session, url, range_format) for url in urls)
+        )
+
+
+def load_additional_bots(
+    config_file: str = None, range_format: RangeFormat = 'range'
+) -> tuple:
+    """Load additional bot IP ranges from configuration file, with their total count."""
     if config_file is None:
         # Try to load from package data first
         try:
-            config_content = (files('good_bots') / 'additional_bots.json').read_text()
-            config = json.loads(config_content)
-        except (FileNotFoundError, ImportError, json.JSONDecodeError):
+            # Read raw bytes; orjson decodes UTF-8 itself during parsing
+            config_content = (files('good_bots') / 'additional_bots.json').read_bytes()
+            config = orjson.loads(config_content)
+        except (FileNotFoundError, ImportError, orjson.JSONDecodeError):
             # Fall back to local file if package data not available
             config_file = 'additional_bots.json'
             if not os.path.exists(config_file):
-                return {}
+                return {}, 0
             try:
-                with open(config_file, 'r') as f:
-                    config = json.load(f)
-            except (json.JSONDecodeError, IOError) as e:
+                with open(config_file, 'rb') as f:
+                    config = orjson.loads(f.read())
+            except (orjson.JSONDecodeError, IOError) as e:
                 print(
                     f"Warning: Could not load additional bots config: {e}",
                     file=sys.stderr,
                 )
-                return {}
+                return {}, 0
     else:
         if not os.path.exists(config_file):
-            return {}
+            return {}, 0
         try:
-            with open(config_file, 'r') as f:
-                config = json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
+            with open(config_file, 'rb') as f:
+                config = orjson.loads(f.read())
+        except (orjson.JSONDecodeError, IOError) as e:
             print(
                 f"Warning: Could not load additional bots config: {e}", file=sys.stderr
             )
-            return {}
+            return {}, 0
 
     additional_ranges = {}
+    total_count = 0
     for bot in config.get('additional_bots', []):
         bot_name = bot.get('name', 'Unknown Bot')
         ip_ranges = []
 
         for ip_range in bot.get('ip_ranges', []):
-            if '/' in ip_range:  # CIDR notation
-                converted_range = cidr_to_range(ip_range)
-                if converted_range:
-                    ip_ranges.append(converted_range)
+            # CIDR notation, or in CIDR mode a single IP written as a /32
+            if '/' in ip_range or (range_format == 'cidr' and '-' not in ip_range):
+                interval = _cidr_interval(ip_range, range_format)
+                if interval:
+                    ip_ranges.append(interval[2])
+            elif '-' in ip_range and range_format == 'cidr':  # Range to CIDR
+                ip_ranges.extend(range_to_cidrs(ip_range))
             else:  # Already in range format or single IP
                 ip_ranges.append(ip_range)
 
         if ip_ranges:
-            additional_ranges[bot_name] = sorted(set(ip_ranges))
+            # Remove duplicates, keeping order; the collapse orders them by address
+            additional_ranges[bot_name] = list(dict.fromkeys(ip_ranges))
+            total_count += len(additional_ranges[bot_name])
+
+    return additional_ranges, total_count
+
+
+def _range_interval(ip_range: str, range_format: RangeFormat) -> tuple:
+    """Parse a CIDR, range or single IP string into a (start, end, text) interval."""
+    if '/' in ip_range:
+        return _cidr_interval(ip_range, range_format)
+
+    try:
+        start, end = _parse_range(ip_range)
+    except (OSError, ValueError):
+        return None
+    # Ranges and bare addresses aren't CIDR output, so let the collapse
+    # re-summarize them
+    return start, end, ip_range if range_format == 'range' else None
+
+
+def _format_interval(start: int, end: int, range_format: RangeFormat) -> List[str]:
+    """Format an address interval as one range or the CIDRs covering it."""
+    if range_format == 'cidr':
+        return _summarize_interval(start, end)
+    return [f"{_int_to_ip(start)}-{_int_to_ip(end)}"]
 
-    return additional_ranges
+
+def _merge_intervals(bounds: List[tuple]) -> List[list]:
+    """Sort address intervals and merge the overlapping and adjacent ones."""
+    merged = []
+    for start, end in sorted(bounds):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _collapse_intervals(bot_ip_ranges: dict, range_format: RangeFormat) -> tuple:
+    """Merge each bot's intervals and drop those another bot already covers.
+
+    Returns the surviving [start, end, text] intervals per bot in address
+    order, where text is None for intervals that merged several entries, and
+    the entries that couldn't be parsed.
+    """
+    intervals = []
+    unparsed = {}
+    for bot_name, entries in bot_ip_ranges.items():
+        bounds = []
+        for entry in entries:
+            interval = (
+                _range_interval(entry, range_format)
+                if isinstance(entry, str)
+                else entry
+            )
+            if interval is None:
+                # Keep anything we can't interpret exactly as it was given
+                unparsed.setdefault(bot_name, []).append(entry)
+            else:
+                bounds.append(interval)
+
+        # Widest first at each start; an entry only keeps its text while it
+        # spans the whole merged interval
+        merged = []
+        for start, end, text in sorted(bounds, key=lambda b: (b[0], -b[1])):
+            if merged and start <= merged[-1][1] + 1:
+                if end > merged[-1][1]:
+                    merged[-1][1] = end
+                    merged[-1][2] = None
+            else:
+                merged.append([start, end, text])
+        intervals.extend((start, end, text, bot_name) for start, end, text in merged)
+
+    # Sweep in address order, widest first: an interval ending before the
+    # furthest end seen so far lies inside an earlier bot's interval
+    intervals.sort(key=lambda interval: (interval[0], -interval[1]))
+    collapsed = {bot_name: [] for bot_name in bot_ip_ranges}
+    covered_to = -1
+    for start, end, text, bot_name in intervals:
+        if end <= covered_to:
+            continue
+        covered_to = end
+        collapsed[bot_name].append((start, end, text))
+
+    return collapsed, unparsed
+
+
+def _format_collapsed(
+    collapsed: dict, unparsed: dict, range_format: RangeFormat
+) -> dict:
+    """Render collapsed intervals, reusing each entry's text where it survived."""
+    formatted = {}
+    for bot_name, intervals in collapsed.items():
+        ip_ranges = []
+        for start, end, text in intervals:
+            if text is None:
+                ip_ranges.extend(_format_interval(start, end, range_format))
+            else:
+                ip_ranges.append(text)
+        ip_ranges.extend(unparsed.get(bot_name, ()))
+        if ip_ranges:
+            formatted[bot_name] = ip_ranges
+    return formatted
 
 
-def generate_bot_ips(output_path: str = None) -> int:
-    """Generate bot IP configuration file."""
+def collapse_bot_ranges(
+    bot_ip_ranges: dict, range_format: RangeFormat = 'range'
+) -> dict:
+    """Merge overlapping ranges per bot and drop ranges another bot already covers.
+
+    Entries are range strings or (start, end, text) intervals from
+    extract_ipv4_intervals.
+    """
+    collapsed, unparsed = _collapse_intervals(bot_ip_ranges, range_format)
+    return _format_collapsed(collapsed, unparsed, range_format)
+
+
+def generate_bot_ips(
+    output_path: str = None,
+    range_format: RangeFormat = 'range',
+    use_async: bool = False,
+) -> int:
+    """Generate bot IP configuration file with ranges in the given format.
+
+    Endpoints are fetched on a thread pool, or on an asyncio event loop when
+    use_async is set and the optional aiohttp dependency is installed.
+    """
     if output_path is None:
         output_path = 'bot_ips_config.py'
 
+    if use_async and aiohttp is None:
+        print(
+            "Warning: aiohttp is not installed, fetching on a thread pool instead",
+            file=sys.stderr,
+        )
+        use_async = False
+
     # Fetch the main endpoint list
     main_url = "https://search-engine-ip-tracker.merj.com/status"
     print(f"Fetching endpoint list from {main_url}...")
@@ -144,13 +570,15 @@ def generate_bot_ips(output_path: str = None) -> int:
         return 1
 
     # Load additional bot ranges from config file
-    additional_bots = load_additional_bots()
+    additional_bots, additional_count = load_additional_bots(range_format=range_format)
 
     # Dictionary to organize IP ranges by bot
-    bot_ip_ranges = additional_bots.copy()  # Start with additional bots
-    total_ranges = sum(len(ranges) for ranges in additional_bots.values())
+    bot_ip_ranges = {  # Start with additional bots
+        bot_name: list(ranges) for bot_name, ranges in additional_bots.items()
+    }
 
-    # Process each endpoint
+    # Collect the endpoints to fetch
+    endpoints = []
     for item in main_data['data']:
         if 'source' not in item or 'url' not in item['source']:
             continue
@@ -158,22 +586,34 @@ def generate_bot_ips(output_path: str = None) -> int:
         endpoint_url = item['source']['url']
         source_id = item['source'].get('id', 'unknown')
         source_type = item['source'].get('type', 'unknown')
+        endpoints.append((source_type, source_id, endpoint_url))
 
+    # Fetch endpoints concurrently; results come back in endpoint order
+    urls = [endpoint[2] for endpoint in endpoints]
+    if use_async:
+        results = asyncio.run(_fetch_all_ipv4_intervals(urls, range_format))
+    else:
+        with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as executor:
+            results = list(
+                executor.map(
+                    partial(fetch_ipv4_intervals, range_format=range_format), urls
+                )
+            )
+
+    # Process each endpoint
+    for (source_type, source_id, endpoint_url), ipv4_intervals in zip(
+        endpoints, results
+    ):
         print(f"Processing {source_type}/{source_id}: {endpoint_url}")
 
-        endpoint_data = fetch_json(endpoint_url)
-        if endpoint_data:
-            ipv4_ranges = extract_ipv4_addresses(endpoint_data)
-            if ipv4_ranges:
+        if ipv4_intervals is not None:
+            if ipv4_intervals:
                 # Create a readable bot name
                 bot_name = (
                     f"{source_type.title()} - {source_id.replace('-', ' ').title()}"
                 )
-                bot_ip_ranges[bot_name] = sorted(
-                    set(ipv4_ranges)
-                )  # Remove duplicates and sort
-                total_ranges += len(ipv4_ranges)
-                print(f"  Found {len(ipv4_ranges)} IPv4 ranges")
+                bot_ip_ranges.setdefault(bot_name, []).extend(ipv4_intervals)
+                print(f"  Found {len(ipv4_intervals)} IPv4 ranges")
             else:
                 print("  No IPv4 ranges found")
         else:
@@ -181,35 +621,100 @@ def generate_bot_ips(output_path: str = None) -> int:
 
     # Print summary of additional bots if any were loaded
     if additional_bots:
-        print("\nAdditional bots loaded from config:")
+        print(f"\nAdditional bots loaded from config ({additional_count} ranges):")
         for bot_name, ranges in additional_bots.items():
             print(f"  {bot_name}: {len(ranges)} ranges")
 
-    # Generate the Python configuration
+    # Summarize overlapping and nested ranges, within and across bots; the
+    # surviving integer intervals also build the lookup tables below
+    collapsed, unparsed = _collapse_intervals(bot_ip_ranges, range_format)
+    bot_ip_ranges = _format_collapsed(collapsed, unparsed, range_format)
+    for bot_name, entries in unparsed.items():
+        for entry in entries:
+            print(
+                f"Warning: Could not parse IP range {entry} for {bot_name}; "
+                "it is kept in GOOD_BOTS but left out of is_good_bot",
+                file=sys.stderr,
+            )
+
+    # Skip rewriting the file if its data hasn't changed since the last run
+    digest = hashlib.sha256(
+        orjson.dumps(
+            {'version': __version__, 'bots': bot_ip_ranges},
+            option=orjson.OPT_SORT_KEYS,
+        )
+    ).hexdigest()
+    digest_path = f'{output_path}.sha256'
+    if os.path.exists(output_path) and os.path.exists(digest_path):
+        try:
+            with open(digest_path, 'r') as f:
+                unchanged = f.read().strip() == digest
+        except IOError:
+            unchanged = False
+        if unchanged:
+            print(f"\nBot IP ranges unchanged, leaving {output_path} as is")
+            return 0
+
+    # Merge every bot's ranges into sorted, non-overlapping lookup intervals
+    intervals = _merge_intervals(
+        [
+            (start, end)
+            for bot_intervals in collapsed.values()
+            for start, end, _ in bot_intervals
+        ]
+    )
+
+    # Stream the Python configuration to a temporary file, then move it into
+    # place so a failed write never leaves a truncated config behind
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    output_content = f'''# Bot IP addresses for django-turnstile-site-protect
+    total_ranges = 0
+    tmp_output_path = f'{output_path}.tmp'
+    try:
+        # Drop the old digest first so a failed run can't pass as unchanged
+        with suppress(FileNotFoundError):
+            os.remove(digest_path)
+
+        with open(tmp_output_path, 'w', buffering=_WRITE_BUFFER_SIZE) as f:
+            f.write(f'''# Bot IP addresses for django-turnstile-site-protect
 # Generated on {current_time}
 # Source: https://search-engine-ip-tracker.merj.com/status
 
+import socket
+from bisect import bisect_right
+
 GOOD_BOTS = [
-'''
+''')
 
-    # Add IP ranges organized by bot
-    for bot_name, ip_ranges in sorted(bot_ip_ranges.items()):
-        output_content += f"    # {bot_name}\n"
-        for ip_range in ip_ranges:
-            output_content += f"    '{ip_range}',\n"
-        output_content += "\n"  # Add blank line between bots
+            # Add IP ranges organized by bot
+            for bot_name, ip_ranges in sorted(bot_ip_ranges.items()):
+                f.write(f"    # {bot_name}\n")
+                f.writelines(f"    '{ip_range}',\n" for ip_range in ip_ranges)
+                total_ranges += len(ip_ranges)
+                f.write("\n")  # Add blank line between bots
 
-    output_content += f"""]
+            f.write(f"""]
 
 # Total IP ranges: {total_ranges}
-"""
 
-    # Write to file
-    try:
-        with open(output_path, 'w') as f:
-            f.write(output_content)
+# Sorted, non-overlapping integer intervals covering the parsable GOOD_BOTS
+# ranges for fast lookups
+""")
+
+            for name, index in (('GOOD_BOT_STARTS', 0), ('GOOD_BOT_ENDS', 1)):
+                f.write(f"{name} = (\n")
+                for start in range(0, len(intervals), _TABLE_LINE_WIDTH):
+                    end = start + _TABLE_LINE_WIDTH
+                    chunk = intervals[start:end]
+                    values = ", ".join(str(interval[index]) for interval in chunk)
+                    f.write(f"    {values},\n")
+                f.write(")\n")
+
+            f.write(_LOOKUP_FUNCTION)
+        os.replace(tmp_output_path, output_path)
+
+        # Record the data digest only once the configuration is fully written
+        with open(digest_path, 'w') as f:
+            f.write(f"{digest}\n")
 
         output_filename = os.path.basename(output_path)
         print(f"\nGenerated {output_path} with {total_ranges} IP ranges")
@@ -217,8 +722,11 @@ GOOD_BOTS = [
         print(f"from .{os.path.splitext(output_filename)[0]} import GOOD_BOTS")
         print("Then concatenate to your existing TURNSTILE_EXCLUDED_IPS:")
         print("TURNSTILE_EXCLUDED_IPS = TURNSTILE_EXCLUDED_IPS + GOOD_BOTS")
+        print("Or check a single address with is_good_bot(ip) in O(log n)")
 
         return 0
     except IOError as e:
+        with suppress(OSError):
+            os.remove(tmp_output_path)
         print(f"Error writing to {output_path}: {e}", file=sys.stderr)
         return 1
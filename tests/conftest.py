@@ -5,17 +5,41 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from good_bots import core
+
 # Test data for additional bots
 TEST_ADDITIONAL_BOTS = {"test_bot": ["192.0.2.0/24", "203.0.113.0/24"]}
 
 
+@pytest.fixture(autouse=True)
+def isolated_http_cache(tmp_path, monkeypatch):
+    """Keep the HTTP cache out of the user's home directory during tests."""
+    cache_home = tmp_path / "cache"
+    monkeypatch.setenv('XDG_CACHE_HOME', str(cache_home))
+    return cache_home / "good-bots"
+
+
+@pytest.fixture(autouse=True)
+def clear_cidr_caches():
+    """Start each test with empty CIDR conversion caches."""
+    core._cidr_interval.cache_clear()
+
+
+@pytest.fixture
+def async_fetching():
+    """Skip tests of the aiohttp fetch path without the async extra."""
+    return pytest.importorskip('aiohttp')
+
+
 @pytest.fixture
 def mock_requests_get():
-    """Mock requests.get for testing."""
-    with patch('requests.get') as mock_get:
+    """Mock the shared requests session's get for testing."""
+    with patch('good_bots.core._SESSION.get') as mock_get:
         # Set up a default response
         mock_response = MagicMock()
-        mock_response.json.return_value = {"data": []}
+        mock_response.status_code = 200
+        mock_response.headers = {}
+        mock_response.content = b'{"data": []}'
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
         yield mock_get
@@ -25,7 +49,7 @@ def mock_requests_get():
 def mock_importlib_resources():
     """Mock importlib.resources.files for testing."""
     mock_file = MagicMock()
-    mock_file.read_text.return_value = json.dumps(TEST_ADDITIONAL_BOTS)
+    mock_file.read_bytes.return_value = json.dumps(TEST_ADDITIONAL_BOTS).encode()
 
     with patch('good_bots.core.files') as mock_files:
         mock_files.return_value.__truediv__.return_value = mock_file
@@ -15,6 +15,8 @@ def test_cli_help(capsys):
     captured = capsys.readouterr()
     assert "--help" in captured.out
     assert "--path" in captured.out
+    assert "--format" in captured.out
+    assert "--async" in captured.out
 
 
 @patch('good_bots.cli.generate_bot_ips')
@@ -37,7 +39,31 @@ def test_cli_custom_path(mock_generate, tmp_path):
     with patch('sys.argv', ['good-bots', '--path', str(custom_path)]):
         main()
     output_file = custom_path / "bot_ips_config.py"
-    mock_generate.assert_called_once_with(str(output_file))
+    mock_generate.assert_called_once_with(
+        str(output_file), range_format='range', use_async=False
+    )
+
+
+@patch('good_bots.cli.generate_bot_ips')
+def test_cli_cidr_format(mock_generate, tmp_path):
+    """Test CLI passes the requested output format through."""
+    with patch('sys.argv', ['good-bots', '--path', str(tmp_path), '--format', 'cidr']):
+        main()
+    output_file = tmp_path / "bot_ips_config.py"
+    mock_generate.assert_called_once_with(
+        str(output_file), range_format='cidr', use_async=False
+    )
+
+
+@patch('good_bots.cli.generate_bot_ips')
+def test_cli_async_fetching(mock_generate, tmp_path):
+    """Test CLI opts into the asyncio fetch path with --async."""
+    with patch('sys.argv', ['good-bots', '--path', str(tmp_path), '--async']):
+        main()
+    output_file = tmp_path / "bot_ips_config.py"
+    mock_generate.assert_called_once_with(
+        str(output_file), range_format='range', use_async=True
+    )
 
 
 def test_cli_path_traversal_protection(capsys, tmp_path):
@@ -58,7 +84,9 @@ def test_cli_creates_directory(mock_generate, tmp_path):
         main()
     assert new_dir.exists()
     output_file = new_dir / "bot_ips_config.py"
-    mock_generate.assert_called_once_with(str(output_file))
+    mock_generate.assert_called_once_with(
+        str(output_file), range_format='range', use_async=False
+    )
 
 
 @patch('good_bots.core.generate_bot_ips')
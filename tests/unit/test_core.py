@@ -1,7 +1,10 @@
 """Unit tests for core functionality."""
 
+import asyncio
+import json
+import threading
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from good_bots import core
 
@@ -12,8 +15,164 @@ def test_cidr_to_range():
     assert core.cidr_to_range("192.0.2.0/24") == "192.0.2.0-192.0.2.255"
     # Test valid IPv4 single IP
     assert core.cidr_to_range("192.0.2.1/32") == "192.0.2.1-192.0.2.1"
+    # Test host bits are masked off
+    assert core.cidr_to_range("192.0.2.77/25") == "192.0.2.0-192.0.2.127"
+    assert core.cidr_to_range("192.0.2.77/24") == "192.0.2.0-192.0.2.255"
+    # Test the /24 and /32 fast paths still validate the address
+    assert core.cidr_to_range("192.0.256.0/24") is None
+    assert core.cidr_to_range("192.0.2.01/32") is None
+    # Test whole address space and bare addresses
+    assert core.cidr_to_range("0.0.0.0/0") == "0.0.0.0-255.255.255.255"
+    assert core.cidr_to_range("192.0.2.1") == "192.0.2.1-192.0.2.1"
     # Test invalid CIDR
     assert core.cidr_to_range("invalid") is None
+    assert core.cidr_to_range("192.0.2.0/33") is None
+    assert core.cidr_to_range("192.0.2.0/") is None
+    assert core.cidr_to_range("192.0.2.0/\u0662\u0664") is None
+    assert core.cidr_to_range("192.0.2.0/\u0662") is None
+    assert core.cidr_to_range("192.0.2/24") is None
+
+
+def test_cidr_to_range_is_memoized(capsys):
+    """Test repeated CIDRs are served from the cache."""
+    assert core.cidr_to_range("192.0.2.0/24") == "192.0.2.0-192.0.2.255"
+    assert core.cidr_to_range("192.0.2.0/24") == "192.0.2.0-192.0.2.255"
+    assert core._cidr_interval.cache_info().hits == 1
+
+    # Invalid CIDRs are only reported the first time they are seen
+    assert core.cidr_to_range("invalid") is None
+    assert core.cidr_to_range("invalid") is None
+    assert capsys.readouterr().err.count("Invalid CIDR invalid") == 1
+
+
+def test_cidr_interval_cidr_format():
+    """Test CIDR validation and normalization."""
+    assert core._cidr_interval("192.0.2.0/24", 'cidr')[2] == "192.0.2.0/24"
+    # Test host bits are cleared and bare addresses get a prefix length
+    assert core._cidr_interval("192.0.2.77/25", 'cidr')[2] == "192.0.2.0/25"
+    assert core._cidr_interval("192.0.2.1", 'cidr')[2] == "192.0.2.1/32"
+    assert core._cidr_interval("192.0.2.0/024", 'cidr')[2] == "192.0.2.0/24"
+    # Test invalid CIDR
+    assert core._cidr_interval("2001:db8::/32", 'cidr') is None
+
+
+def test_range_to_cidrs(capsys):
+    """Test IP range to CIDR conversion."""
+    assert core.range_to_cidrs("192.0.2.0-192.0.2.255") == ["192.0.2.0/24"]
+    assert core.range_to_cidrs("203.0.112.0-203.0.113.255") == ["203.0.112.0/23"]
+    assert core.range_to_cidrs("192.0.2.0-192.0.2.2") == [
+        "192.0.2.0/31",
+        "192.0.2.2/32",
+    ]
+    assert core.range_to_cidrs("0.0.0.0-255.255.255.255") == ["0.0.0.0/0"]
+    assert core.range_to_cidrs("192.0.2.9-192.0.2.1") == []
+    assert "Invalid IP range 192.0.2.9-192.0.2.1" in capsys.readouterr().err
+
+
+def test_collapse_bot_ranges():
+    """Test overlapping ranges are merged per bot and nested ones dropped."""
+    bot_ip_ranges = {
+        'Bot A': ['10.0.0.0/25', '10.0.0.128/25', '192.0.2.7'],
+        'Bot B': ['10.0.0.0-10.0.0.15', '10.0.0.0/23', 'not an ip'],
+        'Bot C': ['10.0.0.64/26', '198.51.100.0/24'],
+    }
+
+    assert core.collapse_bot_ranges(bot_ip_ranges) == {
+        'Bot A': ['192.0.2.7'],
+        'Bot B': ['10.0.0.0-10.0.1.255', 'not an ip'],
+        'Bot C': ['198.51.100.0-198.51.100.255'],
+    }
+    assert core.collapse_bot_ranges(bot_ip_ranges, 'cidr') == {
+        'Bot A': ['192.0.2.7/32'],
+        'Bot B': ['10.0.0.0/23', 'not an ip'],
+        'Bot C': ['198.51.100.0/24'],
+    }
+
+    # Identical intervals written differently are kept once, for the first bot
+    assert core.collapse_bot_ranges(
+        {'Bot A': ['192.0.2.0/24'], 'Bot B': ['192.0.2.0-192.0.2.255']}
+    ) == {'Bot A': ['192.0.2.0-192.0.2.255']}
+
+    # Ranges are re-summarized in CIDR mode, never written as ranges
+    assert core.collapse_bot_ranges({'Bot': ['192.0.2.0-192.0.2.2']}, 'cidr') == {
+        'Bot': ['192.0.2.0/31', '192.0.2.2/32']
+    }
+
+    # Adjacent ranges merge into one, in address order
+    assert core.collapse_bot_ranges(
+        {'Bot': ['192.0.2.128/25', '192.0.2.0/25', '198.51.100.0/31']}, 'cidr'
+    ) == {'Bot': ['192.0.2.0/24', '198.51.100.0/31']}
+
+
+def test_collapse_bot_ranges_keeps_published_prefixes():
+    """Test prefixes that weren't merged are written exactly as extracted."""
+    data = {
+        'prefixes': [
+            {'ipv4Prefix': '198.51.100.0/24'},
+            {'ipv4Prefix': '198.51.100.128/25'},
+            {'ipv4Prefix': '192.0.2.0/26'},
+            {'ipv4Prefix': '192.0.2.64/26'},
+        ]
+    }
+    intervals = core.extract_ipv4_intervals(data, 'cidr')
+    assert intervals[0] == (3325256704, 3325256959, '198.51.100.0/24')
+
+    with patch('good_bots.core._summarize_interval') as mock_summarize:
+        mock_summarize.return_value = ['192.0.2.0/25']
+        collapsed = core.collapse_bot_ranges({'Bot': intervals}, 'cidr')
+
+    # Only the two adjacent /26s were merged and needed summarizing
+    assert collapsed == {'Bot': ['192.0.2.0/25', '198.51.100.0/24']}
+    mock_summarize.assert_called_once_with(3221225984, 3221226111)
+
+
+def test_load_additional_bots(tmp_path):
+    """Test loading additional bots in range and CIDR format."""
+    config_file = tmp_path / "additional_bots.json"
+    config_file.write_text(
+        json.dumps(
+            {
+                "additional_bots": [
+                    {
+                        "name": "Custom Bot",
+                        "ip_ranges": [
+                            "192.0.2.0/24",
+                            "203.0.112.0-203.0.113.255",
+                            "198.51.100.7",
+                            "192.0.2.0/24",
+                            "2001:db8::/32",
+                        ],
+                    }
+                ]
+            }
+        )
+    )
+
+    assert core.load_additional_bots(str(config_file)) == (
+        {
+            "Custom Bot": [
+                "192.0.2.0-192.0.2.255",
+                "203.0.112.0-203.0.113.255",
+                "198.51.100.7",
+            ]
+        },
+        3,
+    )
+    assert core.load_additional_bots(str(config_file), range_format='cidr') == (
+        {"Custom Bot": ["192.0.2.0/24", "203.0.112.0/23", "198.51.100.7/32"]},
+        3,
+    )
+    assert core.load_additional_bots(str(tmp_path / "missing.json")) == ({}, 0)
+
+
+def test_load_additional_bots_package_data():
+    """Test the bundled additional bots config is loaded by default."""
+    additional_bots, total_count = core.load_additional_bots()
+    assert total_count == 2
+    assert additional_bots["Archive-It Bot"] == [
+        "207.241.224.0-207.241.239.255",
+        "208.70.24.0-208.70.31.255",
+    ]
 
 
 def test_extract_ipv4_addresses(capsys):
@@ -23,6 +182,8 @@ def test_extract_ipv4_addresses(capsys):
         "prefixes": [
             {"ipv4Prefix": "192.0.2.0/24"},  # Valid IPv4
             {"ipv4Prefix": "2001:db8::/32"},  # Invalid IPv6
+            {"ipv4Prefix": "198.51.100.7"},  # Bare address, no prefix length
+            {"ipv4Prefix": "203.0.113.0/24\n"},  # Trailing newline
             {"invalid": "not_an_ip"},  # Missing ipv4Prefix
             "not_a_dict",  # Invalid entry type
         ]
@@ -34,13 +195,14 @@ def test_extract_ipv4_addresses(capsys):
     # Verify the result contains the expected IP range
     assert isinstance(result, list)
     assert "192.0.2.0-192.0.2.255" in result
-    assert len(result) == 1  # Only one valid IPv4 range should be returned
+    assert "198.51.100.7-198.51.100.7" in result
+    assert len(result) == 2  # Only the valid IPv4 ranges should be returned
 
     # Verify warnings were printed for invalid entries
     captured = capsys.readouterr()
-    assert (
-        "Invalid CIDR 2001:db8::/32: Expected 4 octets in '2001:db8::'" in captured.err
-    )
+    assert "Invalid ipv4Prefix format: 2001:db8::/32" in captured.err
+    assert "Invalid ipv4Prefix format: 203.0.113.0/24\n" in captured.err
+    assert "Invalid CIDR" not in captured.err
     assert "Warning: Invalid prefix entry in API response" in captured.err
 
     # Test with no IPv4 addresses
@@ -54,20 +216,88 @@ def test_extract_ipv4_addresses(capsys):
         assert result == []
 
 
-@patch('good_bots.core.requests.get')
+@patch('good_bots.core._SESSION.get')
 def test_fetch_json_success(mock_get):
     """Test successful JSON fetch."""
     mock_response = MagicMock()
-    mock_response.json.return_value = {"test": "data"}
+    mock_response.status_code = 200
+    mock_response.headers = {}
+    mock_response.content = b'{"test": "data"}'
     mock_response.raise_for_status.return_value = None
     mock_get.return_value = mock_response
 
     result = core.fetch_json("https://example.com/api")
     assert result == {"test": "data"}
-    mock_get.assert_called_once_with("https://example.com/api", timeout=30, verify=True)
+    mock_get.assert_called_once_with(
+        "https://example.com/api", timeout=30, verify=True, headers={}
+    )
+
+
+@patch('good_bots.core._SESSION.get')
+def test_fetch_json_revalidates_cached_response(mock_get, isolated_http_cache):
+    """Test cached responses are revalidated with a conditional request."""
+    fresh_response = MagicMock()
+    fresh_response.status_code = 200
+    fresh_response.headers = {
+        'ETag': '"abc123"',
+        'Last-Modified': 'Wed, 01 Jan 2025 00:00:00 GMT',
+    }
+    fresh_response.content = b'{"test": "data"}'
+    not_modified = MagicMock()
+    not_modified.status_code = 304
+    mock_get.side_effect = [fresh_response, not_modified]
+
+    assert core.fetch_json("https://example.com/api") == {"test": "data"}
+    assert isolated_http_cache.is_dir()
+
+    # The second fetch sends the validators and reuses the cached body
+    assert core.fetch_json("https://example.com/api") == {"test": "data"}
+    mock_get.assert_called_with(
+        "https://example.com/api",
+        timeout=30,
+        verify=True,
+        headers={
+            'If-None-Match': '"abc123"',
+            'If-Modified-Since': 'Wed, 01 Jan 2025 00:00:00 GMT',
+        },
+    )
+    not_modified.raise_for_status.assert_not_called()
+
+
+def test_http_cache_ignores_mismatched_body(isolated_http_cache):
+    """Test a cached body that doesn't match its metadata isn't revalidated."""
+    url = "https://example.com/api"
+    core._store_cached(url, {'ETag': '"v1"'}, b'{"version": 1}')
+    core._store_cached(url, {'ETag': '"v2"'}, b'{"version": 2}')
+    assert core._load_cached(url) == ({'If-None-Match': '"v2"'}, b'{"version": 2}')
+    # Only the cache files are left behind, no temporary files
+    assert len(list(isolated_http_cache.iterdir())) == 2
+
+    # A body replaced by another writer after the metadata no longer matches
+    body_path, _ = core._cache_paths(url)
+    with open(body_path, 'wb') as f:
+        f.write(b'{"version": 1}')
+    assert core._load_cached(url) == ({}, None)
 
 
-@patch('good_bots.core.requests.get')
+@patch('good_bots.core._SESSION.get')
+def test_fetch_json_invalid_json(mock_get, capsys):
+    """Test fetch of a response that is not valid JSON."""
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.headers = {}
+    mock_response.content = b'<html>Not JSON</html>'
+    mock_response.raise_for_status.return_value = None
+    mock_get.return_value = mock_response
+
+    result = core.fetch_json("https://example.com/api")
+    assert result is None
+
+    captured = capsys.readouterr()
+    assert "Invalid JSON from https://example.com/api" in captured.err
+
+
+@patch('good_bots.core._SESSION.get')
 def test_fetch_json_failure(mock_get, capsys):
     """Test failed JSON fetch."""
     # Mock the request to raise a RequestException
@@ -86,17 +316,21 @@ def test_fetch_json_failure(mock_get, capsys):
     assert "Error fetching https://example.com/api: Connection error" in captured.err
 
     # Verify the request was made with correct parameters
-    mock_get.assert_called_once_with("https://example.com/api", timeout=30, verify=True)
+    mock_get.assert_called_once_with(
+        "https://example.com/api", timeout=30, verify=True, headers={}
+    )
 
 
 @patch('good_bots.core.fetch_json')
 @patch('good_bots.core.load_additional_bots')
 @patch('builtins.open', new_callable=unittest.mock.mock_open)
+@patch('os.replace')
 @patch('os.path.basename')
 @patch('os.path.splitext')
 def test_generate_bot_ips(
     mock_splitext,
     mock_basename,
+    mock_replace,
     mock_open,
     mock_load_additional,
     mock_fetch,
@@ -125,7 +359,7 @@ def test_generate_bot_ips(
     ]
 
     # Mock the additional bots
-    mock_load_additional.return_value = {'test_bot': ['192.0.2.0/24']}
+    mock_load_additional.return_value = ({'test_bot': ['192.0.2.0/24']}, 1)
 
     # Create a mock file handle for the output file
     mock_file = MagicMock()
@@ -141,13 +375,19 @@ def test_generate_bot_ips(
     assert result == 0
 
     # Verify the file was opened for writing (convert Path to string for comparison)
-    mock_open.assert_called_once_with(str(output_file), 'w')
+    mock_open.assert_any_call(
+        f"{output_file}.tmp", 'w', buffering=core._WRITE_BUFFER_SIZE
+    )
+    mock_open.assert_any_call(f"{output_file}.sha256", 'w')
+    mock_replace.assert_called_once_with(f"{output_file}.tmp", str(output_file))
 
     # Verify the file was written to
     assert mock_file.write.called, "No data was written to the output file"
 
     # Get the content that was written to the file
     written_content = "".join([call[0][0] for call in mock_file.write.call_args_list])
+    for call in mock_file.writelines.call_args_list:
+        written_content += "".join(call[0][0])
 
     # Verify the content
     assert "GOOD_BOTS = [" in written_content
@@ -199,3 +439,432 @@ def test_main_flow_with_custom_path(mock_generate, tmp_path, capsys):
 
     # Verify generate_bot_ips was called with the custom output path
     mock_generate.assert_called_once_with(str(output_file))
+
+
+def test_session_pools_https_connections():
+    """Test the shared session mounts a pooled adapter for HTTPS."""
+    adapter = core._SESSION.get_adapter("https://example.com/api")
+    assert adapter._pool_connections == 16
+    assert adapter._pool_maxsize == 32
+    assert core._SESSION.headers['Accept-Encoding'] == 'gzip, deflate'
+
+
+@patch('good_bots.core.load_additional_bots')
+@patch('good_bots.core.fetch_json')
+def test_generate_bot_ips_fetches_all_endpoints(
+    mock_fetch, mock_load_additional, tmp_path, capsys
+):
+    """Test every endpoint is fetched and reported in endpoint order."""
+    endpoints = {
+        'https://example.com/a.json': {'prefixes': [{'ipv4Prefix': '192.0.2.0/24'}]},
+        'https://example.com/b.json': None,
+        'https://example.com/c.json': {'prefixes': [{'ipv4Prefix': '198.51.100.0/24'}]},
+    }
+    main_data = {
+        'data': [
+            {'source': {'id': name, 'type': 'bot', 'url': url}}
+            for name, url in zip('abc', endpoints)
+        ]
+    }
+    mock_fetch.side_effect = lambda url: endpoints.get(url, main_data)
+    mock_load_additional.return_value = ({}, 0)
+
+    output_file = tmp_path / "bot_ips_config.py"
+    assert core.generate_bot_ips(str(output_file)) == 0
+
+    fetched = [call[0][0] for call in mock_fetch.call_args_list]
+    assert sorted(fetched[1:]) == list(endpoints)
+
+    content = output_file.read_text()
+    assert "192.0.2.0-192.0.2.255" in content
+    assert "198.51.100.0-198.51.100.255" in content
+
+    out = capsys.readouterr().out
+    assert out.index("bot/a") < out.index("bot/b") < out.index("bot/c")
+    assert "Failed to fetch data" in out
+
+
+@patch('good_bots.core.fetch_json')
+def test_fetch_ipv4_intervals(mock_fetch):
+    """Test fetching an endpoint straight to its IPv4 intervals."""
+    mock_fetch.return_value = {'prefixes': [{'ipv4Prefix': '192.0.2.0/24'}]}
+    assert core.fetch_ipv4_intervals("https://example.com/bots.json") == [
+        (3221225984, 3221226239, "192.0.2.0-192.0.2.255")
+    ]
+
+    # A failed fetch is distinguishable from an endpoint with no ranges
+    mock_fetch.return_value = None
+    assert core.fetch_ipv4_intervals("https://example.com/bots.json") is None
+
+
+@patch('good_bots.core.load_additional_bots')
+@patch('good_bots.core.fetch_json')
+def test_generate_bot_ips_cidr_format(mock_fetch, mock_load_additional, tmp_path):
+    """Test generating the configuration in CIDR notation."""
+    mock_fetch.side_effect = [
+        {
+            'data': [
+                {
+                    'source': {
+                        'id': 'test',
+                        'type': 'bot',
+                        'url': 'https://example.com/bots.json',
+                    }
+                }
+            ]
+        },
+        {'prefixes': [{'ipv4Prefix': '192.0.2.0/24'}]},
+    ]
+    mock_load_additional.return_value = ({}, 0)
+
+    output_file = tmp_path / "bot_ips_config.py"
+    assert core.generate_bot_ips(str(output_file), range_format='cidr') == 0
+
+    mock_load_additional.assert_called_once_with(range_format='cidr')
+    content = output_file.read_text()
+    assert "'192.0.2.0/24'," in content
+    assert "192.0.2.0-192.0.2.255" not in content
+
+
+@patch('good_bots.core.load_additional_bots')
+@patch('good_bots.core.fetch_json')
+def test_generate_bot_ips_deduplicates_across_bots(
+    mock_fetch, mock_load_additional, tmp_path
+):
+    """Test ranges shared by several bots are written once, sorted per bot."""
+    main_data = {
+        'data': [
+            {
+                'source': {
+                    'id': name,
+                    'type': 'bot',
+                    'url': f'https://example.com/{name}',
+                }
+            }
+            for name in ('a', 'b')
+        ]
+    }
+    endpoints = {
+        'https://example.com/a': {
+            'prefixes': [
+                {'ipv4Prefix': '198.51.100.0/24'},
+                {'ipv4Prefix': '192.0.2.0/24'},
+            ]
+        },
+        'https://example.com/b': {
+            'prefixes': [
+                {'ipv4Prefix': '192.0.2.0/24'},
+                {'ipv4Prefix': '192.0.2.0/24'},
+            ]
+        },
+    }
+    mock_fetch.side_effect = lambda url: endpoints.get(url, main_data)
+    mock_load_additional.return_value = (
+        {'Extra': ['198.51.100.0-198.51.100.255']},
+        1,
+    )
+
+    output_file = tmp_path / "bot_ips_config.py"
+    assert core.generate_bot_ips(str(output_file)) == 0
+
+    content = output_file.read_text()
+    assert content.count("'198.51.100.0-198.51.100.255',") == 1
+    assert content.count("'192.0.2.0-192.0.2.255',") == 1
+    # Bot B only repeats ranges already listed, so it is left out entirely
+    assert "# Bot - A" in content
+    assert "# Bot - B" not in content
+    assert "# Total IP ranges: 2" in content
+
+
+@patch('good_bots.core.load_additional_bots')
+@patch('good_bots.core.fetch_json')
+def test_generated_config_lookup(mock_fetch, mock_load_additional, tmp_path, capsys):
+    """Test the generated file's integer tables and is_good_bot lookup."""
+    mock_fetch.side_effect = [
+        {
+            'data': [
+                {
+                    'source': {
+                        'id': 'test',
+                        'type': 'bot',
+                        'url': 'https://example.com/bots.json',
+                    }
+                }
+            ]
+        },
+        {
+            'prefixes': [
+                {'ipv4Prefix': '198.51.100.0/24'},
+                {'ipv4Prefix': '192.0.2.0/25'},
+            ]
+        },
+    ]
+    mock_load_additional.return_value = (
+        {'Extra': ['192.0.2.128-192.0.2.255', 'not an ip']},
+        2,
+    )
+
+    output_file = tmp_path / "bot_ips_config.py"
+    assert core.generate_bot_ips(str(output_file)) == 0
+
+    config = {}
+    exec(output_file.read_text(), config)
+
+    # Entries that can't be parsed stay in GOOD_BOTS but are reported
+    assert 'not an ip' in config['GOOD_BOTS']
+    assert "Could not parse IP range not an ip for Extra" in capsys.readouterr().err
+
+    # Ranges from different bots merge into one lookup interval
+    assert config['GOOD_BOT_STARTS'] == (3221225984, 3325256704)
+    assert config['GOOD_BOT_ENDS'] == (3221226239, 3325256959)
+
+    is_good_bot = config['is_good_bot']
+    assert is_good_bot('192.0.2.0')
+    assert is_good_bot('192.0.2.200')
+    assert is_good_bot('198.51.100.255')
+    assert not is_good_bot('192.0.1.255')
+    assert not is_good_bot('198.51.101.0')
+    assert not is_good_bot('2001:db8::1')
+    assert not is_good_bot(None)
+
+
+def test_fetch_all_ipv4_intervals_async(async_fetching, isolated_http_cache):
+    """Test the aiohttp fan-out against a local server, including revalidation."""
+    from aiohttp import web
+
+    async def bots(request):
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304)
+        return web.Response(
+            body=b'{"prefixes": [{"ipv4Prefix": "192.0.2.0/24"}]}',
+            headers={'ETag': '"v1"'},
+        )
+
+    async def broken(request):
+        return web.Response(status=500)
+
+    async def not_json(request):
+        return web.Response(body=b'<html>Not JSON</html>')
+
+    async def run():
+        app = web.Application()
+        app.router.add_get('/bots.json', bots)
+        app.router.add_get('/broken.json', broken)
+        app.router.add_get('/not-json.json', not_json)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        urls = [
+            f'http://127.0.0.1:{port}/{path}'
+            for path in ('bots.json', 'broken.json', 'not-json.json')
+        ]
+        try:
+            first = await core._fetch_all_ipv4_intervals(urls, 'range')
+            second = await core._fetch_all_ipv4_intervals(urls[:1], 'cidr')
+        finally:
+            await runner.cleanup()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == [[(3221225984, 3221226239, "192.0.2.0-192.0.2.255")], None, None]
+    # The second run gets a 304 and is served from the cache
+    assert second == [[(3221225984, 3221226239, "192.0.2.0/24")]]
+
+
+@patch('good_bots.core.load_additional_bots')
+@patch('good_bots.core.fetch_json')
+def test_generate_bot_ips_uses_async_fetching(
+    mock_fetch, mock_load_additional, async_fetching, tmp_path
+):
+    """Test endpoints go through the aiohttp fan-out when asked to."""
+    mock_fetch.return_value = {
+        'data': [
+            {
+                'source': {
+                    'id': 'test',
+                    'type': 'bot',
+                    'url': 'https://example.com/bots.json',
+                }
+            }
+        ]
+    }
+    mock_load_additional.return_value = ({}, 0)
+
+    with patch(
+        'good_bots.core._fetch_all_ipv4_intervals',
+        new_callable=AsyncMock,
+        return_value=[[(3221225984, 3221226239, "192.0.2.0-192.0.2.255")]],
+    ) as mock_fetch_all:
+        output_file = tmp_path / "bot_ips_config.py"
+        assert core.generate_bot_ips(str(output_file), use_async=True) == 0
+
+    mock_fetch_all.assert_awaited_once_with(['https://example.com/bots.json'], 'range')
+    mock_fetch.assert_called_once()  # Only the endpoint list
+    assert "192.0.2.0-192.0.2.255" in output_file.read_text()
+
+
+@patch('good_bots.core.load_additional_bots')
+@patch('good_bots.core.fetch_json')
+def test_generate_bot_ips_async_without_aiohttp(
+    mock_fetch, mock_load_additional, monkeypatch, tmp_path, capsys
+):
+    """Test asking for async fetching without aiohttp falls back to threads."""
+    monkeypatch.setattr(core, 'aiohttp', None)
+    mock_fetch.side_effect = [
+        {
+            'data': [
+                {
+                    'source': {
+                        'id': 'test',
+                        'type': 'bot',
+                        'url': 'https://example.com/bots.json',
+                    }
+                }
+            ]
+        },
+        {'prefixes': [{'ipv4Prefix': '192.0.2.0/24'}]},
+    ]
+    mock_load_additional.return_value = ({}, 0)
+
+    output_file = tmp_path / "bot_ips_config.py"
+    assert core.generate_bot_ips(str(output_file), use_async=True) == 0
+    assert "aiohttp is not installed" in capsys.readouterr().err
+    assert "192.0.2.0-192.0.2.255" in output_file.read_text()
+
+
+def test_fetch_all_ipv4_intervals_async_uses_env_proxy(async_fetching, monkeypatch):
+    """Test the aiohttp fan-out goes through a proxy set in the environment."""
+    from aiohttp import web
+
+    proxied_hosts = []
+
+    async def proxy(request):
+        proxied_hosts.append(request.host)
+        return web.Response(body=b'{"prefixes": [{"ipv4Prefix": "192.0.2.0/24"}]}')
+
+    async def run():
+        app = web.Application()
+        app.router.add_get('/{path:.*}', proxy)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        monkeypatch.setenv('HTTP_PROXY', f'http://127.0.0.1:{port}')
+        monkeypatch.setenv('HTTPS_PROXY', f'http://127.0.0.1:{port}')
+        try:
+            return await core._fetch_all_ipv4_intervals(
+                ['http://bots.example/bots.json'], 'range'
+            )
+        finally:
+            await runner.cleanup()
+
+    for name in ('NO_PROXY', 'no_proxy', 'http_proxy', 'https_proxy'):
+        monkeypatch.delenv(name, raising=False)
+    assert asyncio.run(run()) == [[(3221225984, 3221226239, "192.0.2.0-192.0.2.255")]]
+    assert proxied_hosts == ['bots.example']
+
+
+@patch('good_bots.core.load_additional_bots')
+@patch('good_bots.core.fetch_json')
+def test_generate_bot_ips_skips_unchanged_data(
+    mock_fetch, mock_load_additional, tmp_path, capsys
+):
+    """Test the output file is only rewritten when the bot data changes."""
+    main_data = {'data': []}
+    mock_fetch.return_value = main_data
+    mock_load_additional.return_value = ({'Extra': ['192.0.2.0-192.0.2.255']}, 1)
+
+    output_file = tmp_path / "bot_ips_config.py"
+    digest_file = tmp_path / "bot_ips_config.py.sha256"
+    assert core.generate_bot_ips(str(output_file)) == 0
+    assert digest_file.exists()
+
+    # Same data: the file is left untouched
+    output_file.write_text("# previous run\n")
+    capsys.readouterr()
+    assert core.generate_bot_ips(str(output_file)) == 0
+    assert output_file.read_text() == "# previous run\n"
+    assert "unchanged" in capsys.readouterr().out
+
+    # New data: the file and digest are rewritten
+    previous_digest = digest_file.read_text()
+    mock_load_additional.return_value = (
+        {'Extra': ['198.51.100.0-198.51.100.255']},
+        1,
+    )
+    assert core.generate_bot_ips(str(output_file)) == 0
+    assert "198.51.100.0-198.51.100.255" in output_file.read_text()
+    assert digest_file.read_text() != previous_digest
+
+    # A missing output file is regenerated even if the digest matches
+    output_file.unlink()
+    assert core.generate_bot_ips(str(output_file)) == 0
+    assert output_file.exists()
+
+
+@patch('good_bots.core.load_additional_bots')
+@patch('good_bots.core.fetch_json')
+def test_generate_bot_ips_failed_write_is_not_unchanged(
+    mock_fetch, mock_load_additional, tmp_path, capsys
+):
+    """Test a failed write keeps the old config and is regenerated next run."""
+    mock_fetch.return_value = {'data': []}
+    mock_load_additional.return_value = ({'Extra': ['192.0.2.0-192.0.2.255']}, 1)
+
+    output_file = tmp_path / "bot_ips_config.py"
+    digest_file = tmp_path / "bot_ips_config.py.sha256"
+    assert core.generate_bot_ips(str(output_file)) == 0
+    original = output_file.read_text()
+
+    # New data, but the write fails: the previous config stays in place
+    mock_load_additional.return_value = (
+        {'Extra': ['198.51.100.0-198.51.100.255']},
+        1,
+    )
+    with patch('os.replace', side_effect=OSError("disk full")):
+        assert core.generate_bot_ips(str(output_file)) == 1
+    assert output_file.read_text() == original
+    assert not digest_file.exists()
+    assert not (tmp_path / "bot_ips_config.py.tmp").exists()
+    assert "Error writing to" in capsys.readouterr().err
+
+    # Back to the original data: the config is written again, not skipped
+    mock_load_additional.return_value = ({'Extra': ['192.0.2.0-192.0.2.255']}, 1)
+    assert core.generate_bot_ips(str(output_file)) == 0
+    assert "unchanged" not in capsys.readouterr().out
+    assert "192.0.2.0-192.0.2.255" in output_file.read_text()
+    assert digest_file.exists()
+
+
+def test_fetch_json_async_cache_io_off_loop(async_fetching):
+    """Test cache reads and writes run on worker threads, not the event loop."""
+    threads = {}
+
+    def record(name, result):
+        def wrapper(*args):
+            threads[name] = threading.current_thread()
+            return result
+
+        return wrapper
+
+    response = MagicMock()
+    response.status = 200
+    response.headers = {'ETag': '"v1"'}
+    response.read = AsyncMock(return_value=b'{"prefixes": []}')
+    response.raise_for_status.return_value = None
+    session = MagicMock()
+    session.get.return_value.__aenter__ = AsyncMock(return_value=response)
+    session.get.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    with (
+        patch('good_bots.core._load_cached', record('load', ({}, None))),
+        patch('good_bots.core._store_cached', record('store', None)),
+    ):
+        result = asyncio.run(core._fetch_json_async(session, "https://example.com"))
+
+    assert result == {"prefixes": []}
+    assert threads['load'] is not threading.main_thread()
+    assert threads['store'] is not threading.main_thread()